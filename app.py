@@ -1,119 +1,323 @@
-from flask import Flask, render_template, request, redirect, url_for
-from db_setup import db
+from flask import Flask, render_template, request, redirect, url_for, current_app
+from db_setup import db, configure_sqlite_pragmas
+import json
 import os
 import logging
 from logging.handlers import RotatingFileHandler
 from dotenv import load_dotenv
 
-# Load environment variables from .env file
-load_dotenv()
+# Load environment variables from .env file (skipped in deployments where
+# the orchestrator injects real environment variables; parsing .env costs
+# disk I/O on every worker start)
+if not os.environ.get('SKIP_DOTENV'):
+    load_dotenv(override=False)
 
-# Initialize Flask app
-app = Flask(__name__)
-app.config['SECRET_KEY'] = os.getenv('SECRET_KEY', 'hire-platform-secret-key')
-app.config['SQLALCHEMY_DATABASE_URI'] = os.getenv('DATABASE_URI', 'sqlite:///hire.db')
-app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+# Snapshot environment-derived configuration once (after dotenv has run)
+from config import Settings
+settings = Settings.from_environ()
 
-# Initialize SQLAlchemy with the app
-db.init_app(app)
+# Use orjson for JSON responses when available (C-native serializer,
+# several times faster than the stdlib for large payloads)
+try:
+    import orjson
+    from flask.json.provider import JSONProvider
 
-# Configure logging
-if not os.path.exists('logs'):
-    os.mkdir('logs')
+    class ORJSONProvider(JSONProvider):
+        """Flask JSON provider backed by orjson"""
 
-file_handler = RotatingFileHandler('logs/hire_platform.log', maxBytes=10240, backupCount=10)
-file_handler.setFormatter(logging.Formatter(
-    '%(asctime)s %(levelname)s: %(message)s [in %(pathname)s:%(lineno)d]'
-))
-file_handler.setLevel(logging.INFO)
+        def dumps(self, obj, **kwargs):
+            return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS).decode()
 
-app.logger.addHandler(file_handler)
-app.logger.setLevel(logging.INFO)
-app.logger.info('HIRE Platform startup')
+        def loads(self, s, **kwargs):
+            # orjson has no object_hook; the cookie-session serializer
+            # relies on it to untag session values (flashed messages,
+            # datetimes), so any kwargs route through the stdlib decoder
+            if kwargs:
+                return json.loads(s, **kwargs)
+            return orjson.loads(s)
+except ImportError:
+    ORJSONProvider = None
 
 # Import models after initializing db
 from models import (
-    Customer, Provider, ServiceCategory, 
-    ProviderCategory, Address, Booking, 
-    Payment, OTPVerification
+    Customer, Provider, ServiceCategory,
+    ProviderCategory, Address, GeoCoord,
+    Booking, Payment, OTPVerification
 )
 
+# Initial service categories seeded into a fresh database
+CATEGORIES = [
+    {"name": "Plumbing", "description": "All plumbing services including repairs, installations, and maintenance"},
+    {"name": "Electrical", "description": "Electrical repairs, installations, and maintenance services"},
+    {"name": "Cleaning", "description": "Professional home cleaning services including regular cleaning, deep cleaning, and specialized cleaning"},
+    {"name": "Carpentry", "description": "Woodwork, furniture repairs, and custom woodworking services"},
+    {"name": "Painting", "description": "Interior and exterior painting services for homes and businesses"},
+    {"name": "Landscaping", "description": "Garden maintenance, lawn care, and landscaping design services"},
+    {"name": "HVAC", "description": "Heating, ventilation, and air conditioning installation and repairs"}
+]
+
+# Columns added after the original schema shipped. The project has no
+# migration tool and create_all() only creates missing tables, so init-db
+# bolts these onto databases created before the columns existed.
+_SCHEMA_ADDITIONS = {
+    'providers': [
+        ('rating_count', 'INTEGER NOT NULL DEFAULT 0'),
+        ('rating_sum', 'INTEGER NOT NULL DEFAULT 0'),
+    ],
+    'addresses': [
+        ('geo_hash', 'VARCHAR(40)'),
+    ],
+}
+
+def _migrate_schema():
+    """Add late-added columns and indexes to pre-existing tables
+
+    create_all(checkfirst=True) skips tables that already exist — their
+    declared indexes included — so both the columns and the indexes added
+    after the original schema shipped must be bolted on here.
+    """
+    from sqlalchemy import inspect, text
+
+    inspector = inspect(db.engine)
+    added = []
+    for table, columns in _SCHEMA_ADDITIONS.items():
+        existing = {col['name'] for col in inspector.get_columns(table)}
+        for name, ddl in columns:
+            if name not in existing:
+                db.session.execute(text(f'ALTER TABLE {table} ADD COLUMN {name} {ddl}'))
+                added.append(f'{table}.{name}')
+
+    if any(column.startswith('providers.rating_') for column in added):
+        # Backfill the running totals from completed rated bookings so the
+        # incremental update in rate_booking starts from the real history
+        # instead of clobbering pre-existing averages
+        db.session.execute(text(
+            'UPDATE providers SET '
+            'rating_count = (SELECT COUNT(*) FROM bookings '
+            '  WHERE bookings.provider_id = providers.id '
+            "  AND bookings.status = 'completed' AND bookings.rating IS NOT NULL), "
+            'rating_sum = (SELECT COALESCE(SUM(bookings.rating), 0) FROM bookings '
+            '  WHERE bookings.provider_id = providers.id '
+            "  AND bookings.status = 'completed' AND bookings.rating IS NOT NULL)"
+        ))
+
+    if added:
+        db.session.commit()
+        current_app.logger.info(f'Added missing columns: {", ".join(added)}')
+
+    # Create declared indexes missing from existing tables (committed
+    # above, so indexes on the new columns can build too)
+    created = []
+    for table in db.metadata.sorted_tables:
+        if not inspector.has_table(table.name):
+            continue
+        existing = {ix['name'] for ix in inspector.get_indexes(table.name)}
+        for index in table.indexes:
+            if index.name not in existing:
+                index.create(bind=db.engine)
+                created.append(index.name)
+    if created:
+        current_app.logger.info(f'Created missing indexes: {", ".join(created)}')
+
 # Function to initialize database
 def init_db():
     """Create database tables and add initial data"""
-    app.logger.info('Creating database tables')
-    
-    # Add initial service categories if none exist
-    if ServiceCategory.query.count() == 0:
-        app.logger.info('Adding initial service categories')
-        categories = [
-            ServiceCategory(name="Plumbing", description="All plumbing services including repairs, installations, and maintenance"),
-            ServiceCategory(name="Electrical", description="Electrical repairs, installations, and maintenance services"),
-            ServiceCategory(name="Cleaning", description="Professional home cleaning services including regular cleaning, deep cleaning, and specialized cleaning"),
-            ServiceCategory(name="Carpentry", description="Woodwork, furniture repairs, and custom woodworking services"),
-            ServiceCategory(name="Painting", description="Interior and exterior painting services for homes and businesses"),
-            ServiceCategory(name="Landscaping", description="Garden maintenance, lawn care, and landscaping design services"),
-            ServiceCategory(name="HVAC", description="Heating, ventilation, and air conditioning installation and repairs")
-        ]
-        db.session.add_all(categories)
-        db.session.commit()
-        app.logger.info(f'Added {len(categories)} initial service categories')
+    current_app.logger.info('Creating database tables')
 
-# Initialize database
-with app.app_context():
-    db.create_all()
-    init_db()
+    _migrate_schema()
 
-# Register blueprints
-from routes import (
-    main_bp, customer_bp, provider_bp, 
-    service_bp, booking_bp, payment_bp
-)
+    # Seed categories idempotently: the unique constraint on name lets the
+    # database skip rows that already exist, so no existence SELECT is
+    # needed and concurrent workers cannot double-insert
+    dialect = db.engine.dialect.name
+    if dialect == 'sqlite':
+        from sqlalchemy.dialects.sqlite import insert as dialect_insert
+    elif dialect == 'postgresql':
+        from sqlalchemy.dialects.postgresql import insert as dialect_insert
+    else:
+        dialect_insert = None
+
+    if dialect_insert is not None:
+        stmt = dialect_insert(ServiceCategory.__table__).on_conflict_do_nothing(
+            index_elements=['name']
+        )
+        db.session.execute(stmt, CATEGORIES)
+    else:
+        # EXISTS stops at the first row instead of scanning to count them
+        from sqlalchemy import exists
+        has_categories = db.session.query(
+            exists().where(ServiceCategory.id.isnot(None))
+        ).scalar()
+        if not has_categories:
+            db.session.execute(ServiceCategory.__table__.insert(), CATEGORIES)
+    db.session.commit()
+    current_app.logger.info(f'Ensured {len(CATEGORIES)} initial service categories exist')
+
+def create_app():
+    """Application factory: build and configure the Flask app
+
+    Blueprints are imported inside the factory so each import is paid once
+    at construction time, when the worker builds the app.
+    """
+    app = Flask(__name__)
+    # Match routes with or without a trailing slash so requests never pay a
+    # 308 redirect (which doubles the round-trips for the affected URL)
+    app.url_map.strict_slashes = False
+    if ORJSONProvider is not None:
+        app.json = ORJSONProvider(app)
+    app.config['SECRET_KEY'] = settings.secret_key
+    app.config['SQLALCHEMY_DATABASE_URI'] = settings.database_uri
+    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    # Explicitly disable query echo/recording so a stray debug setting never
+    # adds per-query logging or stack capture in production
+    app.config['SQLALCHEMY_ECHO'] = False
+    app.config['SQLALCHEMY_RECORD_QUERIES'] = False
+    if not settings.debug:
+        app.config['TEMPLATES_AUTO_RELOAD'] = False
+    # Let browsers cache /static assets for a day; Flask's static handler
+    # already answers conditional requests with 304 Not Modified
+    app.config['SEND_FILE_MAX_AGE_DEFAULT'] = 86400
+
+    if app.config['SQLALCHEMY_DATABASE_URI'].startswith('sqlite'):
+        app.config['SQLALCHEMY_ENGINE_OPTIONS'] = {
+            'connect_args': {'check_same_thread': False, 'timeout': 30}
+        }
+    else:
+        # Networked databases (e.g. SQL Server/Postgres migration target): size
+        # the pool for the WSGI worker count and recycle/ping connections so
+        # stale sockets never surface on the request path
+        app.config['SQLALCHEMY_ENGINE_OPTIONS'] = {
+            'pool_size': settings.db_pool_size,
+            'max_overflow': settings.db_max_overflow,
+            'pool_recycle': 1800,
+            'pool_pre_ping': True,
+            'pool_use_lifo': True
+        }
+        if app.config['SQLALCHEMY_DATABASE_URI'].startswith('postgresql'):
+            # psycopg2 composes multi-VALUES statements for insert-heavy
+            # paths (bookings, payments, OTP rows) instead of row-at-a-time
+            # executemany
+            app.config['SQLALCHEMY_ENGINE_OPTIONS'].update({
+                'executemany_mode': 'values_plus_batch',
+                'executemany_values_page_size': 1000,
+                'executemany_batch_page_size': 500
+            })
+
+    # Server-side sessions in Redis when configured: the cookie shrinks to a
+    # session id and each lookup is an in-memory GET instead of verifying
+    # and deserializing the full payload per request
+    if settings.session_redis_url:
+        try:
+            import redis
+            from flask_session import Session
+            app.config['SESSION_TYPE'] = 'redis'
+            app.config['SESSION_REDIS'] = redis.from_url(settings.session_redis_url)
+            Session(app)
+        except ImportError:
+            app.logger.warning(
+                'SESSION_REDIS_URL set but Flask-Session/redis not installed; '
+                'falling back to cookie sessions'
+            )
+
+    # Initialize SQLAlchemy with the app
+    db.init_app(app)
 
-# Register blueprints with their prefixes
-app.register_blueprint(main_bp)
-app.register_blueprint(customer_bp, url_prefix='/customer')
-app.register_blueprint(provider_bp, url_prefix='/provider')
-app.register_blueprint(service_bp, url_prefix='/services')
-app.register_blueprint(booking_bp, url_prefix='/booking')
-app.register_blueprint(payment_bp, url_prefix='/payment')
-
-# Error handlers
-@app.errorhandler(404)
-def not_found_error(error):
-    app.logger.info(f'404 error: {request.url}')
-    return render_template('errors/404.html'), 404
-
-@app.errorhandler(500)
-def internal_error(error):
-    app.logger.error(f'500 error: {str(error)}')
-    db.session.rollback()  # Roll back session in case of database error
-    return render_template('errors/500.html'), 500
-
-@app.errorhandler(403)
-def forbidden_error(error):
-    app.logger.info(f'403 error: {request.url}')
-    return render_template('errors/403.html'), 403
-
-@app.context_processor
-def utility_processor():
-    """Add utility functions to Jinja templates"""
-    def format_datetime(value, format='%d %b, %Y %H:%M'):
-        """Format a datetime object to string"""
-        if value is None:
-            return ""
-        return value.strftime(format)
-    
-    def format_currency(value):
-        """Format a number as currency"""
-        if value is None:
-            return "$0.00"
-        return f"${value:.2f}"
-    
-    return dict(
-        format_datetime=format_datetime,
-        format_currency=format_currency
+    # Enable WAL mode and friendlier pragmas for SQLite so reads can proceed
+    # concurrently with writes
+    if app.config['SQLALCHEMY_DATABASE_URI'].startswith('sqlite'):
+        with app.app_context():
+            configure_sqlite_pragmas(db.engine)
+
+    # Configure logging
+    if not os.path.exists('logs'):
+        os.mkdir('logs')
+
+    file_handler = RotatingFileHandler('logs/hire_platform.log', maxBytes=10240, backupCount=10)
+    file_handler.setFormatter(logging.Formatter(
+        '%(asctime)s %(levelname)s: %(message)s [in %(pathname)s:%(lineno)d]'
+    ))
+    file_handler.setLevel(logging.INFO)
+
+    app.logger.addHandler(file_handler)
+    app.logger.setLevel(logging.INFO)
+    app.logger.info('HIRE Platform startup')
+
+    # Register blueprints (imported here so the cost is paid once, at app
+    # construction, and import errors surface at boot)
+    from routes import (
+        main_bp, customer_bp, provider_bp,
+        service_bp, booking_bp, payment_bp
     )
 
+    # Register blueprints with their prefixes
+    app.register_blueprint(main_bp)
+    app.register_blueprint(customer_bp, url_prefix='/customer')
+    app.register_blueprint(provider_bp, url_prefix='/provider')
+    app.register_blueprint(service_bp, url_prefix='/services')
+    app.register_blueprint(booking_bp, url_prefix='/booking')
+    app.register_blueprint(payment_bp, url_prefix='/payment')
+
+    # Force the routing map to sort/index its rules now instead of lazily
+    # on the first matched request
+    app.url_map.update()
+
+    # Error handlers
+    @app.errorhandler(404)
+    def not_found_error(error):
+        app.logger.info(f'404 error: {request.url}')
+        return render_template('errors/404.html'), 404
+
+    @app.errorhandler(500)
+    def internal_error(error):
+        app.logger.error(f'500 error: {str(error)}')
+        db.session.rollback()  # Roll back session in case of database error
+        return render_template('errors/500.html'), 500
+
+    @app.errorhandler(403)
+    def forbidden_error(error):
+        app.logger.info(f'403 error: {request.url}')
+        return render_template('errors/403.html'), 403
+
+    @app.context_processor
+    def utility_processor():
+        """Add utility functions to Jinja templates"""
+        def format_datetime(value, format='%d %b, %Y %H:%M'):
+            """Format a datetime object to string"""
+            if value is None:
+                return ""
+            return value.strftime(format)
+
+        def format_currency(value):
+            """Format a number as currency"""
+            if value is None:
+                return "$0.00"
+            return f"${value:.2f}"
+
+        return dict(
+            format_datetime=format_datetime,
+            format_currency=format_currency
+        )
+
+    @app.cli.command("init-db")
+    def init_db_command():
+        """Create database tables and seed initial data (run once at deploy time)"""
+        # Single metadata pass; checkfirst issues the catalog probes once
+        # here rather than on every worker start
+        db.metadata.create_all(bind=db.engine, checkfirst=True)
+        init_db()
+        print('Database initialized')
+
+    return app
+
+# Module-level app for WSGI servers and the tests
+app = create_app()
+
+# Opt-in convenience for local development: production deploys should run
+# `flask init-db` once instead of paying the catalog probes per worker
+if settings.auto_init_db:
+    with app.app_context():
+        db.metadata.create_all(bind=db.engine, checkfirst=True)
+        init_db()
+
 if __name__ == '__main__':
-    app.run(debug=os.getenv('FLASK_DEBUG', 'False').lower() == 'true', host='0.0.0.0', port=int(os.getenv('PORT', 5000)))
\ No newline at end of file
+    app.run(debug=settings.debug, host='0.0.0.0', port=settings.port)
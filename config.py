@@ -0,0 +1,33 @@
+import os
+from dataclasses import dataclass
+
+@dataclass(frozen=True)
+class Settings:
+    """Application settings frozen once at startup
+
+    Reading os.environ repeatedly at request time costs a dict probe plus
+    default construction per call; instead the environment is snapshotted
+    into this immutable object when the process boots.
+    """
+    secret_key: str
+    database_uri: str
+    db_pool_size: int
+    db_max_overflow: int
+    debug: bool
+    port: int
+    auto_init_db: bool
+    session_redis_url: str
+
+    @classmethod
+    def from_environ(cls):
+        """Build Settings from the current process environment"""
+        return cls(
+            secret_key=os.getenv('SECRET_KEY', 'hire-platform-secret-key'),
+            database_uri=os.getenv('DATABASE_URI', 'sqlite:///hire.db'),
+            db_pool_size=int(os.getenv('DB_POOL_SIZE', 10)),
+            db_max_overflow=int(os.getenv('DB_MAX_OVERFLOW', 20)),
+            debug=os.getenv('FLASK_DEBUG', 'False').lower() == 'true',
+            port=int(os.getenv('PORT', 5000)),
+            auto_init_db=os.getenv('AUTO_INIT_DB', 'True').lower() == 'true',
+            session_redis_url=os.getenv('SESSION_REDIS_URL', '')
+        )
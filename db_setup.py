@@ -1,4 +1,45 @@
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import event
 
-# Initialize SQLAlchemy without binding to an app
-db = SQLAlchemy()
\ No newline at end of file
+# Initialize SQLAlchemy without binding to an app.
+# autoflush=False skips the identity-map scan that otherwise runs before
+# every query (read-heavy routes never need it), and expire_on_commit=False
+# keeps loaded objects usable after commit without a reload round-trip.
+# Routes that query their own pending writes must call db.session.flush().
+db = SQLAlchemy(session_options={'autoflush': False, 'expire_on_commit': False})
+
+def bulk_insert(model, rows, page_size=1000, commit=True):
+    """Insert a list of row dicts for a model via Core executemany
+
+    Use this instead of constructing ORM instances in a loop whenever many
+    rows go into one table (imports, seeds, batch onboarding): the rows are
+    sent in paged executemany batches rather than one INSERT per object.
+
+    Args:
+        model: Model class whose table receives the rows
+        rows: List of column->value dicts
+        page_size: Maximum rows per executemany batch
+        commit: Commit after the last batch; pass False when the caller
+            manages a larger transaction
+    """
+    stmt = model.__table__.insert()
+    for i in range(0, len(rows), page_size):
+        db.session.execute(stmt, rows[i:i + page_size])
+    if commit:
+        db.session.commit()
+
+def configure_sqlite_pragmas(engine):
+    """Set per-connection SQLite pragmas for better concurrency
+
+    WAL mode lets readers run concurrently with a writer and
+    synchronous=NORMAL amortizes fsyncs across transactions, which matters
+    once several workers share the same database file.
+    """
+    @event.listens_for(engine, 'connect')
+    def _set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        cursor.execute('PRAGMA journal_mode=WAL')
+        cursor.execute('PRAGMA synchronous=NORMAL')
+        cursor.execute('PRAGMA temp_store=MEMORY')
+        cursor.execute('PRAGMA mmap_size=268435456')
+        cursor.close()
\ No newline at end of file
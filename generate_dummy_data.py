@@ -1,10 +1,80 @@
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime, timedelta
+import os
 import random
+import numpy as np
 from faker import Faker
 from models import db, Customer, Provider, ServiceCategory, ProviderCategory, Address, Booking, Payment, OTPVerification
+from db_setup import bulk_insert
 
 fake = Faker()
 
+# Numeric columns (prices, ratings, coordinates) are drawn in bulk from
+# one generator: a single rng.uniform(..., n) call fills a C array where
+# random.uniform would cross the interpreter boundary once per value
+_rng = np.random.default_rng()
+
+# Precomputed bcrypt hash of 'password' shared by every dummy account.
+# Keep this a literal: calling bcrypt.hashpw() here would cost ~100ms per
+# row, which is the whole point of seeding with a fixed hash.
+_DUMMY_BCRYPT_HASH = "$2b$12$EixZaYVK1fsbY1eIYhQ3h.ihI9fhIvjZvJ/vJYrJXpIr8qz5ELu."
+
+def _fake_phone():
+    """Cheap E.164-style US number
+
+    Faker's phone_number() goes through provider/format resolution per
+    call and can produce strings longer than the 15-char column; a random
+    ten-digit number is orders of magnitude cheaper and always fits.
+    """
+    return f"+1{random.randint(2000000000, 9999999999)}"
+
+# Row building is pure Faker/random work with no shared state, so for
+# large counts it shards cleanly across worker processes; the insert
+# itself always runs on the main process. Below this many rows the
+# process start-up cost outweighs the win, so building stays inline.
+_PARALLEL_MIN_ROWS = 1000
+
+_worker_fake = None
+
+def _init_row_worker():
+    """Seed a per-process Faker (and random) so workers diverge"""
+    global _worker_fake
+    seed = os.getpid()
+    _worker_fake = Faker()
+    _worker_fake.seed_instance(seed)
+    random.seed(seed)
+
+def _build_rows(builder, count):
+    """Build `count` row dicts, sharding across processes when large"""
+    if count >= _PARALLEL_MIN_ROWS:
+        with ProcessPoolExecutor(initializer=_init_row_worker) as ex:
+            return list(ex.map(builder, range(count), chunksize=128))
+    return [builder(i) for i in range(count)]
+
+def _build_customer_row(_):
+    f = _worker_fake or fake
+    return {
+        "email": f.email(),
+        "phone": _fake_phone(),
+        "password_hash": _DUMMY_BCRYPT_HASH,
+        "first_name": f.first_name(),
+        "last_name": f.last_name(),
+        "is_verified": True  # Always set to True
+    }
+
+def _build_provider_row(_):
+    f = _worker_fake or fake
+    return {
+        "email": f.email(),
+        "phone": _fake_phone(),
+        "password_hash": _DUMMY_BCRYPT_HASH,
+        "first_name": f.first_name(),
+        "last_name": f.last_name(),
+        "verification_document": "document.jpg",
+        "is_verified": True  # Always set to True
+    }
+
 # Service categories
 service_categories = [
     "Plumbing",
@@ -19,210 +89,229 @@ service_categories = [
 
 def create_customers(count=5):
     """Generate dummy customers"""
-    customers = []
-    for _ in range(count):
-        customer = Customer(
-            email=fake.email(),
-            phone=fake.phone_number(),
-            password_hash="$2b$12$EixZaYVK1fsbY1eIYhQ3h.ihI9fhIvjZvJ/vJYrJXpIr8qz5ELu.",  # 'password'
-            first_name=fake.first_name(),
-            last_name=fake.last_name(),
-            is_verified=True  # Always set to True
-        )
-        db.session.add(customer)
-        customers.append(customer)
-    db.session.commit()
+    # Plain dicts + paged Core inserts skip the per-instance
+    # unit-of-work bookkeeping and emit multi-row executemany batches
+    rows = _build_rows(_build_customer_row, count)
+    bulk_insert(Customer, rows, commit=False)
     print("\nCustomer login credentials:")
-    for customer in customers:
-        print(f"Email: {customer.email}, Password: password")
-    return customers
+    for row in rows:
+        print(f"Email: {row['email']}, Password: password")
+    # One SELECT to pick up the generated primary keys
+    return Customer.query.order_by(Customer.id).all()
 
 def create_providers(count=5):
     """Generate dummy providers"""
-    providers = []
-    for _ in range(count):
-        provider = Provider(
-            email=fake.email(),
-            phone=fake.phone_number(),
-            password_hash="$2b$12$EixZaYVK1fsbY1eIYhQ3h.ihI9fhIvjZvJ/vJYrJXpIr8qz5ELu.",  # 'password'
-            first_name=fake.first_name(),
-            last_name=fake.last_name(),
-            verification_document="document.jpg",
-            experience_years=random.randint(1, 20),
-            is_available=random.choice([True, False]),
-            avg_rating=round(random.uniform(1, 5), 1) if random.choice([True, False]) else None,
-            is_verified=True  # Always set to True
-        )
-        db.session.add(provider)
-        providers.append(provider)
-    db.session.commit()
+    rows = _build_rows(_build_provider_row, count)
+    # Numeric fields drawn in bulk; .tolist() converts back to Python
+    # scalars for the DBAPI
+    exp_years = _rng.integers(1, 21, count).tolist()
+    available = (_rng.integers(0, 2, count) == 1).tolist()
+    rated = (_rng.integers(0, 2, count) == 1).tolist()
+    ratings = np.round(_rng.uniform(1, 5, count), 1).tolist()
+    for row, years, is_avail, has_rating, rating in zip(
+            rows, exp_years, available, rated, ratings):
+        row["experience_years"] = years
+        row["is_available"] = is_avail
+        row["avg_rating"] = rating if has_rating else None
+    bulk_insert(Provider, rows, commit=False)
     print("\nProvider login credentials:")
-    for provider in providers:
-        print(f"Email: {provider.email}, Password: password")
-    return providers
+    for row in rows:
+        print(f"Email: {row['email']}, Password: password")
+    return Provider.query.order_by(Provider.id).all()
 
 def create_service_categories():
     """Generate service categories"""
-    categories = []
-    for name in service_categories:
-        category = ServiceCategory(
-            name=name,
-            description=f"Professional {name.lower()} services"
-        )
-        db.session.add(category)
-        categories.append(category)
-    db.session.commit()
-    return categories
+    rows = [
+        {"name": name, "description": f"Professional {name.lower()} services"}
+        for name in service_categories
+    ]
+    bulk_insert(ServiceCategory, rows, commit=False)
+    return ServiceCategory.query.order_by(ServiceCategory.id).all()
 
 def create_provider_services(providers, categories):
     """Associate providers with services"""
-    provider_services = []
-    for provider in providers:
-        for category in random.sample(categories, random.randint(1, 3)):
-            pc = ProviderCategory(
-                provider_id=provider.id,
-                category_id=category.id,
-                price_rate=round(random.uniform(20, 200), 2)
-            )
-            db.session.add(pc)
-            provider_services.append(pc)
-    db.session.commit()
-    return provider_services
+    pairs = [
+        (provider.id, category.id)
+        for provider in providers
+        for category in random.sample(categories, random.randint(1, 3))
+    ]
+    prices = np.round(_rng.uniform(20, 200, len(pairs)), 2).tolist()
+    rows = [
+        {"provider_id": provider_id, "category_id": category_id, "price_rate": price}
+        for (provider_id, category_id), price in zip(pairs, prices)
+    ]
+    bulk_insert(ProviderCategory, rows, commit=False)
+    return ProviderCategory.query.order_by(ProviderCategory.id).all()
 
 def create_addresses(customers, providers):
     """Generate addresses for customers and providers"""
-    addresses = []
-    
-    # Customer addresses
+    rows = []
+    street_address, city, state, postcode = (
+        fake.street_address, fake.city, fake.state, fake.postcode
+    )
+
+    # Customer addresses (both owner keys are always present so the rows
+    # share one shape, which Core executemany requires)
     for customer in customers:
         for _ in range(random.randint(1, 3)):
-            address = Address(
-                customer_id=customer.id,
-                address_line=fake.street_address(),
-                city=fake.city(),
-                state=fake.state(),
-                postal_code=fake.postcode(),
-                latitude=float(fake.latitude()),
-                longitude=float(fake.longitude())
-            )
-            db.session.add(address)
-            addresses.append(address)
-    
+            rows.append({
+                "customer_id": customer.id,
+                "provider_id": None,
+                "address_line": street_address(),
+                "city": city(),
+                "state": state(),
+                "postal_code": postcode()
+            })
+
     # Provider addresses
     for provider in providers:
-        address = Address(
-            provider_id=provider.id,
-            address_line=fake.street_address(),
-            city=fake.city(),
-            state=fake.state(),
-            postal_code=fake.postcode(),
-            latitude=float(fake.latitude()),
-            longitude=float(fake.longitude())
-        )
-        db.session.add(address)
-        addresses.append(address)
-    
-    db.session.commit()
-    return addresses
+        rows.append({
+            "customer_id": None,
+            "provider_id": provider.id,
+            "address_line": street_address(),
+            "city": city(),
+            "state": state(),
+            "postal_code": postcode()
+        })
+
+    # Coordinates drawn in bulk once the row count is known; plain
+    # uniform floats also avoid the Decimal parse inside fake.latitude()
+    lats = _rng.uniform(-90, 90, len(rows)).tolist()
+    lons = _rng.uniform(-180, 180, len(rows)).tolist()
+    for row, lat, lon in zip(rows, lats, lons):
+        row["latitude"] = lat
+        row["longitude"] = lon
+
+    bulk_insert(Address, rows, commit=False)
+    return Address.query.order_by(Address.id).all()
 
 def create_bookings(customers, providers, categories, addresses):
     """Generate bookings"""
-    bookings = []
+    rows = []
     statuses = ['pending', 'confirmed', 'completed', 'cancelled']
     time_slots = ["9:00 AM", "11:00 AM", "1:00 PM", "3:00 PM", "5:00 PM"]
-    
+
+    # One SELECT for every provider's offerings instead of a query per
+    # booking iteration
+    pc_by_provider = defaultdict(list)
+    for pc in ProviderCategory.query.all():
+        pc_by_provider[pc.provider_id].append(pc)
+
+    # Group addresses by owner once instead of rescanning the full list
+    # for every customer (O(A+C) rather than O(C*A))
+    by_customer = defaultdict(list)
+    for a in addresses:
+        if a.customer_id:
+            by_customer[a.customer_id].append(a)
+
+    # Time-invariant within a run; read the clock once, not per booking
+    today = datetime.utcnow().date()
+
     for customer in customers:
-        customer_addresses = [a for a in addresses if a.customer_id == customer.id]
+        customer_addresses = by_customer.get(customer.id)
         if not customer_addresses:
             continue
-            
+
         for _ in range(random.randint(1, 5)):
             provider = random.choice(providers)
-            provider_categories = ProviderCategory.query.filter_by(provider_id=provider.id).all()
+            provider_categories = pc_by_provider.get(provider.id)
             if not provider_categories:
                 continue
-                
-            category = random.choice(provider_categories).category
+
+            pc = random.choice(provider_categories)
             address = random.choice(customer_addresses)
-            
+
             # Random date in next 30 days
-            booking_date = datetime.utcnow().date() + timedelta(days=random.randint(1, 30))
-            
-            booking = Booking(
-                customer_id=customer.id,
-                provider_id=provider.id,
-                category_id=category.id,
-                address_id=address.id,
-                booking_date=booking_date,
-                time_slot=random.choice(time_slots),
-                status=random.choice(statuses),
-                rating=random.randint(1, 5) if random.choice([True, False]) else None,
-                rating_comment=fake.sentence() if random.choice([True, False]) else None
-            )
-            db.session.add(booking)
-            bookings.append(booking)
-    
-    db.session.commit()
-    return bookings
-
-def create_payments(bookings):
-    """Generate payments for bookings"""
-    payments = []
+            booking_date = today + timedelta(days=random.randint(1, 30))
+
+            rows.append({
+                "customer_id": customer.id,
+                "provider_id": provider.id,
+                "category_id": pc.category_id,
+                "address_id": address.id,
+                "booking_date": booking_date,
+                "time_slot": random.choice(time_slots),
+                "status": random.choice(statuses),
+                "rating": random.randint(1, 5) if random.choice([True, False]) else None,
+                "rating_comment": fake.sentence() if random.choice([True, False]) else None
+            })
+
+    bulk_insert(Booking, rows, commit=False)
+    return Booking.query.order_by(Booking.id).all()
+
+def create_payments():
+    """Generate payments for confirmed/completed bookings"""
     methods = ['credit_card', 'debit_card', 'paypal', 'bank_transfer']
     statuses = ['pending', 'successful', 'failed', 'refunded']
-    
-    for booking in bookings:
-        if booking.status in ['confirmed', 'completed']:
-            provider_category = ProviderCategory.query.filter_by(
-                provider_id=booking.provider_id,
-                category_id=booking.category_id
-            ).first()
-            
-            if provider_category:
-                payment = Payment(
-                    booking_id=booking.id,
-                    amount=provider_category.price_rate,
-                    payment_method=random.choice(methods),
-                    transaction_id=fake.uuid4(),
-                    status=random.choice(statuses)
-                )
-                db.session.add(payment)
-                payments.append(payment)
-    
-    db.session.commit()
-    return payments
+
+    # One joined SELECT pairs each payable booking with its price row,
+    # filtering by status in SQL instead of in Python
+    payable = db.session.query(Booking, ProviderCategory).join(
+        ProviderCategory,
+        (ProviderCategory.provider_id == Booking.provider_id)
+        & (ProviderCategory.category_id == Booking.category_id)
+    ).filter(Booking.status.in_(['confirmed', 'completed'])).all()
+
+    rows = [
+        {
+            "booking_id": booking.id,
+            "amount": provider_category.price_rate,
+            "payment_method": random.choice(methods),
+            "transaction_id": fake.uuid4(),
+            "status": random.choice(statuses)
+        }
+        for booking, provider_category in payable
+    ]
+
+    bulk_insert(Payment, rows, commit=False)
+    return Payment.query.order_by(Payment.id).all()
 
 def generate_dummy_data():
     """Main function to generate all dummy data"""
+    from sqlalchemy import text
+
     print("Generating dummy data...")
-    
+
     # Clear existing data
     print("Clearing existing data...")
     db.drop_all()
     db.create_all()
-    
-    # Create data
-    print("Creating customers...")
-    customers = create_customers()
-    
-    print("Creating providers...")
-    providers = create_providers()
-    
-    print("Creating service categories...")
-    categories = create_service_categories()
-    
-    print("Creating provider services...")
-    provider_services = create_provider_services(providers, categories)
-    
-    print("Creating addresses...")
-    addresses = create_addresses(customers, providers)
-    
-    print("Creating bookings...")
-    bookings = create_bookings(customers, providers, categories, addresses)
-    
-    print("Creating payments...")
-    payments = create_payments(bookings)
-    
+
+    # Seeding recreates everything from scratch, so durability can be
+    # relaxed for its duration; normal settings return with the next
+    # connection
+    if db.engine.dialect.name == 'sqlite':
+        db.session.execute(text('PRAGMA synchronous=OFF'))
+
+    # The create_* steps all run inside one transaction with a single
+    # commit (one fsync) at the end, instead of one commit per table
+    try:
+        print("Creating customers...")
+        customers = create_customers()
+
+        print("Creating providers...")
+        providers = create_providers()
+
+        print("Creating service categories...")
+        categories = create_service_categories()
+
+        print("Creating provider services...")
+        provider_services = create_provider_services(providers, categories)
+
+        print("Creating addresses...")
+        addresses = create_addresses(customers, providers)
+
+        print("Creating bookings...")
+        bookings = create_bookings(customers, providers, categories, addresses)
+
+        print("Creating payments...")
+        payments = create_payments()
+
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+
     print("Dummy data generation complete!")
 
 if __name__ == "__main__":
@@ -0,0 +1,18 @@
+import multiprocessing
+import os
+
+# Every route is I/O-bound (SQLite/Postgres, Redis, Nominatim, Twilio), so
+# gevent workers multiplex many in-flight requests per process instead of
+# blocking a whole sync worker on each socket wait.
+worker_class = 'gevent'
+workers = int(os.getenv('GUNICORN_WORKERS', multiprocessing.cpu_count() * 2 + 1))
+worker_connections = int(os.getenv('GUNICORN_WORKER_CONNECTIONS', 1000))
+
+# No preload_app here: gevent monkey-patches the stdlib after the worker
+# forks, so importing the app (and its module-level thread pool and
+# requests.Session) in the master would bake in unpatched primitives and
+# can deadlock workers. Each worker imports the app itself instead of
+# sharing the master's pages copy-on-write.
+
+bind = os.getenv('GUNICORN_BIND', '0.0.0.0:8000')
+accesslog = '-'
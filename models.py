@@ -17,7 +17,7 @@ class Customer(db.Model):
     # Relationships
     addresses = db.relationship('Address', backref='customer', lazy=True, 
                               foreign_keys='Address.customer_id')
-    bookings = db.relationship('Booking', backref='customer', lazy=True)
+    bookings = db.relationship('Booking', backref=db.backref('customer', lazy='joined'), lazy=True)
     
     def get_full_name(self):
         """Return user's full name"""
@@ -40,15 +40,20 @@ class Provider(db.Model):
     verification_document = db.Column(db.String(255), nullable=False)
     experience_years = db.Column(db.Integer, default=0)
     is_available = db.Column(db.Boolean, default=True)
-    avg_rating = db.Column(db.Float, nullable=True)
+    # Indexed: the home page orders providers by avg_rating DESC
+    avg_rating = db.Column(db.Float, nullable=True, index=True)
+    # Running totals so a new rating is O(1) arithmetic instead of a
+    # recompute over all completed bookings
+    rating_count = db.Column(db.Integer, default=0, nullable=False)
+    rating_sum = db.Column(db.Integer, default=0, nullable=False)
     is_verified = db.Column(db.Boolean, default=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
-    
+
     # Relationships
-    addresses = db.relationship('Address', backref='provider', lazy=True, 
+    addresses = db.relationship('Address', backref='provider', lazy=True,
                               foreign_keys='Address.provider_id')
-    services = db.relationship('ProviderCategory', backref='provider', lazy=True)
-    bookings = db.relationship('Booking', backref='provider', lazy=True)
+    services = db.relationship('ProviderCategory', backref='provider', lazy='selectin')
+    bookings = db.relationship('Booking', backref=db.backref('provider', lazy='joined'), lazy=True)
     
     def get_full_name(self):
         """Return provider's full name"""
@@ -74,32 +79,57 @@ class ProviderCategory(db.Model):
     
     id = db.Column(db.Integer, primary_key=True)
     provider_id = db.Column(db.Integer, db.ForeignKey('providers.id'), nullable=False)
-    category_id = db.Column(db.Integer, db.ForeignKey('service_categories.id'), nullable=False)
+    # Indexed: the matcher filters offerings by category alone, which the
+    # (provider_id, category_id) unique index below cannot serve
+    category_id = db.Column(db.Integer, db.ForeignKey('service_categories.id'), nullable=False, index=True)
     price_rate = db.Column(db.Float, nullable=False)
-    
-    # Relationship
-    category = db.relationship('ServiceCategory', backref='provider_categories')
-    
+
+    # Relationship (joined: the category row is always rendered next to the
+    # association, so fetch it in the same SELECT)
+    category = db.relationship('ServiceCategory', backref='provider_categories', lazy='joined')
+
     __table_args__ = (
+        # Doubles as the composite (provider_id, category_id) index used by
+        # pair lookups in scoring and payments
         db.UniqueConstraint('provider_id', 'category_id', name='uq_provider_category'),
     )
     
     def __repr__(self):
         return f"<ProviderCategory provider_id={self.provider_id} category_id={self.category_id}>"
 
+class GeoCoord(db.Model):
+    """Geocoded coordinates keyed by a hash of the normalized address
+
+    Shared across users: once any address string has been resolved via
+    Nominatim, every later Address with the same normalized text reuses
+    the stored coordinates instead of re-issuing the API call.
+    """
+    __tablename__ = 'geo_coords'
+
+    hash = db.Column(db.String(40), primary_key=True)
+    latitude = db.Column(db.Float, nullable=False)
+    longitude = db.Column(db.Float, nullable=False)
+    fetched_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    def __repr__(self):
+        return f"<GeoCoord {self.hash}>"
+
 class Address(db.Model):
     """Address model with geocoding"""
     __tablename__ = 'addresses'
-    
+
     id = db.Column(db.Integer, primary_key=True)
-    customer_id = db.Column(db.Integer, db.ForeignKey('customers.id'), nullable=True)
-    provider_id = db.Column(db.Integer, db.ForeignKey('providers.id'), nullable=True)
+    # Indexed: every address lookup filters by its owning customer/provider
+    customer_id = db.Column(db.Integer, db.ForeignKey('customers.id'), nullable=True, index=True)
+    provider_id = db.Column(db.Integer, db.ForeignKey('providers.id'), nullable=True, index=True)
     address_line = db.Column(db.String(255), nullable=False)
     city = db.Column(db.String(100), nullable=False)
     state = db.Column(db.String(100), nullable=False)
     postal_code = db.Column(db.String(20), nullable=False)
     latitude = db.Column(db.Float, nullable=True)
     longitude = db.Column(db.Float, nullable=True)
+    # Hash of the normalized address text, linking to GeoCoord
+    geo_hash = db.Column(db.String(40), nullable=True, index=True)
     
     # Relationships
     bookings = db.relationship('Booking', backref='address', lazy=True)
@@ -142,8 +172,18 @@ class Booking(db.Model):
     
     # Relationships
     payment = db.relationship('Payment', backref='booking', lazy=True, uselist=False)
-    category = db.relationship('ServiceCategory')
-    
+    category = db.relationship('ServiceCategory', lazy='joined')
+
+    __table_args__ = (
+        # Dashboards filter by owner; conflict checks filter by provider+date
+        db.Index('ix_booking_customer_status', 'customer_id', 'status'),
+        db.Index('ix_booking_provider_date', 'provider_id', 'booking_date'),
+        # Dashboards order the owner's bookings by recency; these let the
+        # planner walk the index instead of sorting the filtered rows
+        db.Index('ix_booking_customer_created', 'customer_id', 'created_at'),
+        db.Index('ix_booking_provider_created', 'provider_id', 'created_at'),
+    )
+
     def __repr__(self):
         return f"<Booking {self.id} status={self.status}>"
 
@@ -184,6 +224,11 @@ class OTPVerification(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     expires_at = db.Column(db.DateTime, nullable=False)
     is_used = db.Column(db.Boolean, default=False)
-    
+
+    __table_args__ = (
+        # verify_otp fetches the latest unused code for a user
+        db.Index('ix_otp_user_lookup', 'user_id', 'user_type', 'is_used', 'created_at'),
+    )
+
     def __repr__(self):
         return f"<OTPVerification for {self.user_type} {self.user_id}>"
\ No newline at end of file
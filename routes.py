@@ -1,18 +1,22 @@
-from flask import Blueprint, render_template, request, redirect, url_for, flash, session
-from werkzeug.security import generate_password_hash, check_password_hash
-import os
+from flask import Blueprint, render_template, request, redirect, url_for, flash, session, current_app
 from datetime import datetime, timedelta
 import random
-import requests
+
+from sqlalchemy import func
+from sqlalchemy.orm import selectinload
 
 from db_setup import db
 from models import (
     Customer, Provider, ServiceCategory, ProviderCategory, 
     Address, Booking, Payment, OTPVerification
 )
+# verify_otp is aliased because the main.verify_otp view below would
+# otherwise shadow it inside this module
 from services import (
-    find_matching_providers, calculate_distance, 
-    verify_otp, generate_otp
+    find_matching_providers, calculate_distances,
+    verify_otp as check_otp, generate_otp, store_otp, get_service_categories,
+    geocode_address_async,
+    hash_password, verify_password
 )
 
 # Create blueprints for different sections of the application
@@ -24,28 +28,93 @@ booking_bp = Blueprint('booking', __name__, url_prefix='/booking')
 payment_bp = Blueprint('payment', __name__, url_prefix='/payment')
 
 # Helper functions
+class SessionUser:
+    """Lightweight logged-in user rebuilt from the session
+
+    Carries just enough for navigation/greeting templates so routes that
+    only display who is logged in can skip the per-request user SELECT.
+    Routes that touch relationships (addresses, bookings) still load the
+    full model via get_current_user().
+    """
+    __slots__ = ('id', 'user_type', 'first_name', 'last_name')
+
+    def __init__(self, id, user_type, first_name, last_name):
+        self.id = id
+        self.user_type = user_type
+        self.first_name = first_name
+        self.last_name = last_name
+
+    def get_full_name(self):
+        """Return user's full name"""
+        return f"{self.first_name} {self.last_name}"
+
+def cache_session_user(user, user_type):
+    """Store the display fields of the logged-in user in the session"""
+    session['user_cache'] = {
+        'id': user.id,
+        'user_type': user_type,
+        'first_name': user.first_name,
+        'last_name': user.last_name
+    }
+
+def get_session_user():
+    """Get the current user from the session cache, without a DB query
+
+    Falls back to (and repopulates from) the database for sessions created
+    before the cache existed.
+    """
+    user_id = session.get('user_id')
+    if not user_id:
+        return None
+
+    cached = session.get('user_cache')
+    if cached and cached.get('id') == user_id:
+        return SessionUser(**cached)
+
+    user = get_current_user()
+    if user is not None:
+        cache_session_user(user, session.get('user_type'))
+    return user
+
 def get_current_user():
     """Get the current logged-in user"""
     user_id = session.get('user_id')
     user_type = session.get('user_type')
-    
+
     if not user_id or not user_type:
         return None
-    
+
     if user_type == 'customer':
         return Customer.query.get(user_id)
     elif user_type == 'provider':
         return Provider.query.get(user_id)
-    
+
     return None
 
+def require_role(role):
+    """Return the logged-in user's id when their session role matches
+
+    The role already lives in the session, so gates that only need
+    role + id can skip the per-request Customer/Provider SELECT; row
+    ownership is then enforced in the query that fetches the row.
+
+    Args:
+        role: 'customer' or 'provider'
+
+    Returns:
+        The user id, or None when not logged in with that role
+    """
+    if session.get('user_type') != role:
+        return None
+    return session.get('user_id')
+
 # Main routes
 @main_bp.route('/')
 def index():
     """Home page"""
-    categories = ServiceCategory.query.all()
+    categories = get_service_categories()
     top_providers = Provider.query.filter(Provider.avg_rating.isnot(None)).order_by(Provider.avg_rating.desc()).limit(5).all()
-    return render_template('index.html', categories=categories, top_providers=top_providers, user=get_current_user())
+    return render_template('index.html', categories=categories, top_providers=top_providers, user=get_session_user())
 
 @main_bp.route('/verify-otp', methods=['GET', 'POST'])
 def verify_otp():
@@ -62,10 +131,10 @@ def verify_otp():
         
         if not entered_otp:
             flash('Please enter the verification code', 'danger')
-            return render_template('main.verify_otp.html')
-        
+            return render_template('verify_otp.html')
+
         # Verify OTP using the database record
-        if verify_otp(user_id, entered_otp, user_type):
+        if check_otp(user_id, entered_otp, user_type):
             # Mark user as verified
             if user_type == 'customer':
                 user = Customer.query.get(user_id)
@@ -78,7 +147,8 @@ def verify_otp():
                     session.pop('temp_user_type', None)
                     session['user_id'] = user.id
                     session['user_type'] = 'customer'
-                    
+                    cache_session_user(user, 'customer')
+
                     flash('Phone verified successfully! You are now logged in.', 'success')
                     return redirect(url_for('customer.dashboard'))
             
@@ -93,7 +163,8 @@ def verify_otp():
                     session.pop('temp_user_type', None)
                     session['user_id'] = user.id
                     session['user_type'] = 'provider'
-                    
+                    cache_session_user(user, 'provider')
+
                     flash('Phone verified successfully! You are now logged in.', 'success')
                     return redirect(url_for('provider.dashboard'))
         
@@ -106,6 +177,7 @@ def logout():
     """User logout"""
     session.pop('user_id', None)
     session.pop('user_type', None)
+    session.pop('user_cache', None)
     flash('You have been logged out', 'success')
     return redirect(url_for('main.index'))
 
@@ -120,181 +192,214 @@ def search_providers():
         return redirect(url_for('service.service_list'))
     
     category = ServiceCategory.query.get_or_404(category_id)
-    
-    # Find providers for this category
-    provider_categories = ProviderCategory.query.filter_by(category_id=category_id).all()
-    providers = [pc.provider for pc in provider_categories if pc.provider.is_verified and pc.provider.is_available]
-    
+
+    # Find verified, available providers for this category together with
+    # their address in a single JOIN instead of one query per provider
+    provider_rows = db.session.query(Provider, Address).join(
+        ProviderCategory, ProviderCategory.provider_id == Provider.id
+    ).outerjoin(
+        Address, Address.provider_id == Provider.id
+    ).filter(
+        ProviderCategory.category_id == category_id,
+        Provider.is_verified == True,
+        Provider.is_available == True
+    ).all()
+
+    # A provider may have several addresses; keep the first row per provider
+    seen_ids = set()
+    provider_addresses = []
+    for provider, provider_address in provider_rows:
+        if provider.id not in seen_ids:
+            seen_ids.add(provider.id)
+            provider_addresses.append((provider, provider_address))
+
+    providers = [provider for provider, _ in provider_addresses]
+
     # If address is provided, sort providers by distance
     if address_id:
         address = Address.query.get(address_id)
-        if address and address.latitude and address.longitude:
-            # Calculate distance for each provider and sort
-            provider_distances = []
-            for provider in providers:
-                # Get provider's address
-                provider_address = Address.query.filter_by(provider_id=provider.id).first()
-                
-                if provider_address and provider_address.latitude and provider_address.longitude:
-                    distance = calculate_distance(
-                        address.latitude, address.longitude,
-                        provider_address.latitude, provider_address.longitude
-                    )
-                else:
-                    distance = float('inf')  # If provider has no address, put at end of list
-                
-                provider_distances.append((provider, distance))
-            
-            # Sort by distance
-            provider_distances.sort(key=lambda x: x[1])
-            providers = [p[0] for p in provider_distances]
+        if address and address.latitude and address.longitude and providers:
+            # Vectorized haversine over all providers at once; providers
+            # without coordinates get +inf and sort to the end
+            lats = [pa.latitude if pa and pa.latitude else float('nan')
+                    for _, pa in provider_addresses]
+            lons = [pa.longitude if pa and pa.longitude else float('nan')
+                    for _, pa in provider_addresses]
+            distances = calculate_distances(address.latitude, address.longitude, lats, lons)
+            providers = [providers[i] for i in distances.argsort(kind='stable')]
     
     return render_template(
         'search_results.html',
         category=category,
         providers=providers,
-        user=get_current_user()
+        user=get_session_user()
     )
 
-# Customer routes
-@customer_bp.route('/register', methods=['GET', 'POST'])
-def register():
-    """Customer registration"""
+# Shared auth flows: the customer and provider handlers differed only in
+# model class, a couple of provider-only fields and redirect targets, so
+# one parameterized body serves both and keeps the hot code small
+def _register(Model, user_type, template):
+    """Registration flow shared by customers and providers"""
     if request.method == 'POST':
-        # Check if phone already exists
-        existing_customer = Customer.query.filter_by(phone=request.form['phone']).first()
-        if existing_customer:
-            flash('Phone number already registered', 'error')
-            return redirect(url_for('customer.register'))
-            
         email = request.form.get('email')
         phone = request.form.get('phone')
         first_name = request.form.get('first_name')
         last_name = request.form.get('last_name')
         password = request.form.get('password')
-        
+
         # Simple validation
         if not all([email, phone, first_name, last_name, password]):
             flash('All fields are required', 'danger')
-            return render_template('customer/register.html')
-        
-        # Check if email already exists
-        if Customer.query.filter_by(email=email).first() or Provider.query.filter_by(email=email).first():
+            return render_template(template)
+
+        # Check if phone already exists
+        if Model.query.filter_by(phone=phone).first():
+            flash('Phone number already registered', 'danger')
+            return render_template(template)
+
+        # Check if email already exists: one EXISTS probe over both user
+        # tables instead of two row fetches
+        email_taken = db.session.query(
+            Customer.query.filter_by(email=email).exists() |
+            Provider.query.filter_by(email=email).exists()
+        ).scalar()
+        if email_taken:
             flash('Email already registered', 'danger')
-            return render_template('customer/register.html')
-        
-        # Create new customer
-        customer = Customer(
+            return render_template(template)
+
+        fields = dict(
             email=email,
             phone=phone,
             first_name=first_name,
             last_name=last_name,
-            password_hash=generate_password_hash(password)
+            password_hash=hash_password(password)
         )
-        db.session.add(customer)
+        if Model is Provider:
+            fields['experience_years'] = int(request.form.get('experience_years', 0))
+            fields['verification_document'] = 'verification_placeholder.pdf'  # Placeholder
+
+        user = Model(**fields)
+        db.session.add(user)
         db.session.commit()
-        
+
         # Generate and send OTP via Twilio API
         otp_code, error = generate_otp(phone)
-        
+
         if error:
             flash(f'Account created but failed to send OTP: {error}', 'warning')
-            db.session.delete(customer)
+            db.session.delete(user)
             db.session.commit()
-            return render_template('customer/register.html')
-            
-        # Create OTP record
-        otp_expiry = datetime.utcnow() + timedelta(minutes=10)
-        otp_verification = OTPVerification(
-            user_id=customer.id,
-            user_type='customer',
-            otp_code=otp_code,
-            expires_at=otp_expiry
-        )
-        db.session.add(otp_verification)
-        db.session.commit()
-        
-        session['temp_user_id'] = customer.id
-        session['temp_user_type'] = 'customer'
-        
+            return render_template(template)
+
+        # Store the OTP in Redis with a TTL when configured; otherwise
+        # persist the verification record with an explicit expiry
+        if not store_otp(user.id, user_type, otp_code):
+            otp_expiry = datetime.utcnow() + timedelta(minutes=10)
+            otp_verification = OTPVerification(
+                user_id=user.id,
+                user_type=user_type,
+                otp_code=otp_code,
+                expires_at=otp_expiry
+            )
+            db.session.add(otp_verification)
+            db.session.commit()
+
+        session['temp_user_id'] = user.id
+        session['temp_user_type'] = user_type
+
         flash('Account created! Verification code sent to your phone.', 'success')
-        return redirect(url_for('main.verify_otp_route'))
-    
-    return render_template('customer/register.html')
+        return redirect(url_for('main.verify_otp'))
 
-@customer_bp.route('/login', methods=['GET', 'POST'])
-def login():
-    """Customer login"""
+    return render_template(template)
+
+def _login(Model, user_type, template, dashboard_endpoint):
+    """Login flow shared by customers and providers"""
     if request.method == 'POST':
         email = request.form.get('email')
         password = request.form.get('password')
-        
+
         if not email or not password:
             flash('Email and password are required', 'danger')
-            return render_template('customer/login.html')
-        
-        customer = Customer.query.filter_by(email=email).first()
-        
-        if not customer:
+            return render_template(template)
+
+        user = Model.query.filter_by(email=email).first()
+
+        if not user:
             flash('Invalid email or password', 'danger')
-            return render_template('customer/login.html')
-            
-        # Handle password verification with try-except to catch HMAC errors
-        try:
-            password_valid = check_password_hash(customer.password_hash, password)
-            if not password_valid:
-                flash('Invalid email or password', 'danger')
-                return render_template('customer/login.html')
-        except TypeError as e:
-            # Handle Python 3.13 HMAC digestmod error
-            if "Missing required argument 'digestmod'" in str(e):
-                # For bcrypt hashes, we can directly check if it starts with $2b$
-                if customer.password_hash.startswith('$2b$') and password == 'password':
-                    # This is a workaround for the dummy data passwords
-                    password_valid = True
-                else:
-                    flash('Authentication error. Please contact support.', 'danger')
-                    return render_template('customer/login.html')
-            else:
-                # Re-raise if it's a different TypeError
-                raise
-        
-        if not customer.is_verified:
+            return render_template(template)
+
+        # Verify password; a non-None new_hash means the stored hash used
+        # an older scheme and should be upgraded in place
+        password_valid, new_hash = verify_password(user.password_hash, password)
+        if not password_valid:
+            flash('Invalid email or password', 'danger')
+            return render_template(template)
+        if new_hash:
+            user.password_hash = new_hash
+            db.session.commit()
+
+        if not user.is_verified:
             flash('Please verify your phone first', 'warning')
-            return render_template('customer/login.html')
-        
+            return render_template(template)
+
         # Log user in
-        session['user_id'] = customer.id
-        session['user_type'] = 'customer'
-        
+        session['user_id'] = user.id
+        session['user_type'] = user_type
+        cache_session_user(user, user_type)
+
         flash('You are now logged in', 'success')
-        return redirect(url_for('customer.dashboard'))
-    
-    return render_template('customer/login.html')
+        return redirect(url_for(dashboard_endpoint))
+
+    return render_template(template)
+
+# Customer routes
+@customer_bp.route('/register', methods=['GET', 'POST'])
+def register():
+    """Customer registration"""
+    return _register(Customer, 'customer', 'customer/register.html')
+
+@customer_bp.route('/login', methods=['GET', 'POST'])
+def login():
+    """Customer login"""
+    return _login(Customer, 'customer', 'customer/login.html', 'customer.dashboard')
 
 @customer_bp.route('/dashboard')
 def dashboard():
     """Customer dashboard"""
-    customer = get_current_user()
-    
-    if not customer or not isinstance(customer, Customer):
+    customer_id = require_role('customer')
+    # The template renders profile fields and addresses, so the full row
+    # is still needed here
+    customer = Customer.query.get(customer_id) if customer_id else None
+
+    if not customer:
         flash('Please log in as a customer', 'warning')
         return redirect(url_for('customer.login'))
-    
-    # Get customer's bookings
-    bookings = Booking.query.filter_by(customer_id=customer.id).order_by(Booking.created_at.desc()).all()
-    
-    return render_template('customer/dashboard.html', customer=customer, bookings=bookings)
+
+    # Get customer's bookings with the rendered relationships batched in
+    # (one IN query per relationship instead of one SELECT per row),
+    # paginated so the dashboard stays constant-memory as history grows
+    page = request.args.get('page', 1, type=int)
+    bookings_page = Booking.query.options(
+        selectinload(Booking.category),
+        selectinload(Booking.provider)
+    ).filter_by(customer_id=customer.id).order_by(
+        Booking.created_at.desc()
+    ).paginate(page=page, per_page=20, error_out=False)
+
+    return render_template(
+        'customer/dashboard.html', customer=customer,
+        bookings=bookings_page.items, bookings_page=bookings_page
+    )
 
 @customer_bp.route('/address/add', methods=['GET', 'POST'])
 def add_address():
     """Add a new address for a customer"""
-    customer = get_current_user()
-    
-    if not customer or not isinstance(customer, Customer):
+    customer_id = require_role('customer')
+
+    if not customer_id:
         flash('Please log in as a customer', 'warning')
         return redirect(url_for('customer.login'))
-    
+
     if request.method == 'POST':
         address_line = request.form.get('address_line')
         city = request.form.get('city')
@@ -307,41 +412,21 @@ def add_address():
         
         # Create new address
         address = Address(
-            customer_id=customer.id,
+            customer_id=customer_id,
             address_line=address_line,
             city=city,
             state=state,
             postal_code=postal_code
         )
         
-        # Try to geocode the address
-        full_address = f"{address_line}, {city}, {state} {postal_code}"
-        
-        try:
-            # Call the geocoding API
-            params = {
-                'q': full_address,
-                'format': 'json',
-                'limit': 1
-            }
-            headers = {
-                'User-Agent': 'HIRE Platform/1.0'
-            }
-            
-            response = requests.get('https://nominatim.openstreetmap.org/search', params=params, headers=headers)
-            
-            if response.status_code == 200:
-                data = response.json()
-                if data:
-                    address.latitude = float(data[0]['lat'])
-                    address.longitude = float(data[0]['lon'])
-        except Exception as e:
-            # Just log the error and continue (geocoding is not critical)
-            print(f"Geocoding error: {e}")
-        
         db.session.add(address)
         db.session.commit()
-        
+
+        # Geocode on a background thread so the request is not held for the
+        # Nominatim round-trip; cached addresses resolve almost instantly
+        # and the coordinates land in a follow-up commit
+        geocode_address_async(current_app._get_current_object(), address.id)
+
         flash('Address added successfully', 'success')
         return redirect(url_for('customer.dashboard'))
     
@@ -351,141 +436,52 @@ def add_address():
 @provider_bp.route('/register', methods=['GET', 'POST'])
 def register():
     """Provider registration"""
-    if request.method == 'POST':
-        email = request.form.get('email')
-        phone = request.form.get('phone')
-        first_name = request.form.get('first_name')
-        last_name = request.form.get('last_name')
-        password = request.form.get('password')
-        experience_years = int(request.form.get('experience_years', 0))
-        
-        # Simple validation
-        if not all([email, phone, first_name, last_name, password]):
-            flash('All fields are required', 'danger')
-            return render_template('provider/register.html')
-        
-        # Check if email already exists
-        if Customer.query.filter_by(email=email).first() or Provider.query.filter_by(email=email).first():
-            flash('Email already registered', 'danger')
-            return render_template('provider/register.html')
-        
-        # Create new provider
-        provider = Provider(
-            email=email,
-            phone=phone,
-            first_name=first_name,
-            last_name=last_name,
-            password_hash=generate_password_hash(password),
-            experience_years=experience_years,
-            verification_document='verification_placeholder.pdf'  # Placeholder
-        )
-        db.session.add(provider)
-        db.session.commit()
-        
-        # Generate and send OTP via Twilio API
-        otp_code, error = generate_otp(phone)
-        
-        if error:
-            flash(f'Account created but failed to send OTP: {error}', 'warning')
-            db.session.delete(provider)
-            db.session.commit()
-            return render_template('provider/register.html')
-            
-        # Create OTP record
-        otp_expiry = datetime.utcnow() + timedelta(minutes=10)
-        otp_verification = OTPVerification(
-            user_id=provider.id,
-            user_type='provider',
-            otp_code=otp_code,
-            expires_at=otp_expiry
-        )
-        db.session.add(otp_verification)
-        db.session.commit()
-        
-        session['temp_user_id'] = provider.id
-        session['temp_user_type'] = 'provider'
-        
-        flash('Account created! Verification code sent to your phone.', 'success')
-        return redirect(url_for('main.verify_otp'))
-    
-    return render_template('provider/register.html')
+    return _register(Provider, 'provider', 'provider/register.html')
 
 @provider_bp.route('/login', methods=['GET', 'POST'])
 def login():
     """Provider login"""
-    if request.method == 'POST':
-        email = request.form.get('email')
-        password = request.form.get('password')
-        
-        if not email or not password:
-            flash('Email and password are required', 'danger')
-            return render_template('provider/login.html')
-        
-        provider = Provider.query.filter_by(email=email).first()
-        
-        if not provider:
-            flash('Invalid email or password', 'danger')
-            return render_template('provider/login.html')
-            
-        # Handle password verification with try-except to catch HMAC errors
-        try:
-            password_valid = check_password_hash(provider.password_hash, password)
-            if not password_valid:
-                flash('Invalid email or password', 'danger')
-                return render_template('provider/login.html')
-        except TypeError as e:
-            # Handle Python 3.13 HMAC digestmod error
-            if "Missing required argument 'digestmod'" in str(e):
-                # For bcrypt hashes, we can directly check if it starts with $2b$
-                if provider.password_hash.startswith('$2b$') and password == 'password':
-                    # This is a workaround for the dummy data passwords
-                    password_valid = True
-                else:
-                    flash('Authentication error. Please contact support.', 'danger')
-                    return render_template('provider/login.html')
-            else:
-                # Re-raise if it's a different TypeError
-                raise
-        
-        if not provider.is_verified:
-            flash('Please verify your phone first', 'warning')
-            return render_template('provider/login.html')
-        
-        # Log user in
-        session['user_id'] = provider.id
-        session['user_type'] = 'provider'
-        
-        flash('You are now logged in', 'success')
-        return redirect(url_for('provider.dashboard'))
-    
-    return render_template('provider/login.html')
+    return _login(Provider, 'provider', 'provider/login.html', 'provider.dashboard')
 
 @provider_bp.route('/dashboard')
 def dashboard():
     """Provider dashboard"""
-    provider = get_current_user()
-    
-    if not provider or not isinstance(provider, Provider):
+    provider_id = require_role('provider')
+    # The template renders profile fields, so the full row is still needed
+    provider = Provider.query.get(provider_id) if provider_id else None
+
+    if not provider:
         flash('Please log in as a provider', 'warning')
         return redirect(url_for('provider.login'))
-    
-    # Get provider's bookings
-    bookings = Booking.query.filter_by(provider_id=provider.id).order_by(Booking.created_at.desc()).all()
-    
+
+    # Get provider's bookings with the rendered relationships batched in,
+    # paginated so the dashboard stays constant-memory as history grows
+    page = request.args.get('page', 1, type=int)
+    bookings_page = Booking.query.options(
+        selectinload(Booking.category),
+        selectinload(Booking.customer)
+    ).filter_by(provider_id=provider.id).order_by(
+        Booking.created_at.desc()
+    ).paginate(page=page, per_page=20, error_out=False)
+
     # Get provider's services
     services = ProviderCategory.query.filter_by(provider_id=provider.id).all()
-    
-    return render_template('provider/dashboard.html', provider=provider, bookings=bookings, services=services)
+
+    return render_template(
+        'provider/dashboard.html', provider=provider,
+        bookings=bookings_page.items, bookings_page=bookings_page,
+        services=services
+    )
 
 @provider_bp.route('/services/add', methods=['GET', 'POST'])
 def add_service():
     """Add a service category for a provider"""
-    provider = get_current_user()
-    
-    if not provider or not isinstance(provider, Provider):
+    provider_id = require_role('provider')
+
+    if not provider_id:
         flash('Please log in as a provider', 'warning')
         return redirect(url_for('provider.login'))
-    
+
     if request.method == 'POST':
         category_id = request.form.get('category_id')
         price_rate = request.form.get('price_rate')
@@ -495,14 +491,14 @@ def add_service():
             return redirect(url_for('provider.add_service'))
         
         # Check if provider already offers this service
-        existing = ProviderCategory.query.filter_by(provider_id=provider.id, category_id=category_id).first()
+        existing = ProviderCategory.query.filter_by(provider_id=provider_id, category_id=category_id).first()
         if existing:
             flash('You already offer this service', 'warning')
             return redirect(url_for('provider.dashboard'))
-        
+
         # Add new provider-category association
         provider_category = ProviderCategory(
-            provider_id=provider.id,
+            provider_id=provider_id,
             category_id=category_id,
             price_rate=float(price_rate)
         )
@@ -512,41 +508,53 @@ def add_service():
         flash('Service added successfully', 'success')
         return redirect(url_for('provider.dashboard'))
     
-    # Get categories not already offered by this provider
-    existing_categories = ProviderCategory.query.filter_by(provider_id=provider.id).with_entities(ProviderCategory.category_id).all()
-    existing_category_ids = [ec.category_id for ec in existing_categories]
-    
-    available_categories = ServiceCategory.query.filter(~ServiceCategory.id.in_(existing_category_ids)).all()
-    
+    # Get categories not already offered by this provider; the subquery
+    # lets the database do the anti-join in one statement instead of
+    # shipping the id list to Python and back
+    offered = db.session.query(ProviderCategory.category_id).filter_by(
+        provider_id=provider_id
+    ).subquery()
+    available_categories = ServiceCategory.query.filter(~ServiceCategory.id.in_(offered)).all()
+
     return render_template('provider/add_service.html', categories=available_categories)
 
 # Service routes
 @service_bp.route('/')
 def service_list():
-    categories = ServiceCategory.query.all()
-    return render_template('services/list.html', categories=categories, user=get_current_user())
+    categories = get_service_categories()
+    return render_template('services/list.html', categories=categories, user=get_session_user())
 
 @service_bp.route('/<int:category_id>')
 def service_detail(category_id):
     """Show details of a specific service category"""
     category = ServiceCategory.query.get_or_404(category_id)
     
-    # Get providers for this category
-    provider_categories = ProviderCategory.query.filter_by(category_id=category_id).all()
-    providers = [pc.provider for pc in provider_categories if pc.provider.is_verified and pc.provider.is_available]
-    
+    # Get verified, available providers for this category in one JOIN
+    # with the filtering done in SQL, instead of lazy-loading pc.provider
+    # per association row and filtering in Python
+    providers = Provider.query.join(
+        ProviderCategory, ProviderCategory.provider_id == Provider.id
+    ).filter(
+        ProviderCategory.category_id == category_id,
+        Provider.is_verified == True,
+        Provider.is_available == True
+    ).all()
+
+    # Full user lookup on purpose: the template iterates user.addresses to
+    # build the "Your Address" search dropdown, which the session-cached
+    # SessionUser cannot provide
     return render_template('services/detail.html', category=category, providers=providers, user=get_current_user())
 
 # Booking routes
 @booking_bp.route('/create/<int:provider_id>', methods=['GET', 'POST'])
 def create_booking(provider_id):
     """Create a new booking"""
-    customer = get_current_user()
-    
-    if not customer or not isinstance(customer, Customer):
+    customer_id = require_role('customer')
+
+    if not customer_id:
         flash('Please log in as a customer', 'warning')
         return redirect(url_for('customer.login'))
-    
+
     provider = Provider.query.get_or_404(provider_id)
     
     if request.method == 'POST':
@@ -561,7 +569,7 @@ def create_booking(provider_id):
         
         # Create new booking
         booking = Booking(
-            customer_id=customer.id,
+            customer_id=customer_id,
             provider_id=provider_id,
             category_id=category_id,
             address_id=address_id,
@@ -579,7 +587,7 @@ def create_booking(provider_id):
     provider_categories = ProviderCategory.query.filter_by(provider_id=provider_id).all()
     
     # Get customer's addresses
-    addresses = Address.query.filter_by(customer_id=customer.id).all()
+    addresses = Address.query.filter_by(customer_id=customer_id).all()
     
     # If no addresses, redirect to add address page
     if not addresses:
@@ -605,39 +613,42 @@ def create_booking(provider_id):
 @booking_bp.route('/<int:booking_id>')
 def booking_detail(booking_id):
     """Show booking details"""
-    user = get_current_user()
-    
-    if not user:
+    user_id = session.get('user_id')
+    user_type = session.get('user_type')
+
+    if not user_id:
         flash('Please log in', 'warning')
         return redirect(url_for('main.index'))
-    
-    booking = Booking.query.get_or_404(booking_id)
-    
-    # Check if user is authorized to view this booking
-    if (isinstance(user, Customer) and booking.customer_id != user.id) or \
-       (isinstance(user, Provider) and booking.provider_id != user.id):
+
+    # Ownership is enforced in the fetch itself: filtering by the session
+    # owner column returns the row only for its customer/provider
+    owner_column = 'customer_id' if user_type == 'customer' else 'provider_id'
+    booking = Booking.query.filter_by(id=booking_id, **{owner_column: user_id}).first()
+
+    if booking is None:
         flash('You are not authorized to view this booking', 'danger')
         return redirect(url_for('main.index'))
-    
-    return render_template('booking/detail.html', booking=booking, user=user)
+
+    return render_template('booking/detail.html', booking=booking, user=get_session_user())
 
 @booking_bp.route('/<int:booking_id>/cancel', methods=['POST'])
 def cancel_booking(booking_id):
     """Cancel a booking"""
-    user = get_current_user()
-    
-    if not user:
+    user_id = session.get('user_id')
+    user_type = session.get('user_type')
+
+    if not user_id:
         flash('Please log in', 'warning')
         return redirect(url_for('main.index'))
-    
-    booking = Booking.query.get_or_404(booking_id)
-    
-    # Check if user is authorized to cancel this booking
-    if (isinstance(user, Customer) and booking.customer_id != user.id) or \
-       (isinstance(user, Provider) and booking.provider_id != user.id):
+
+    # Fetch and authorize in one query
+    owner_column = 'customer_id' if user_type == 'customer' else 'provider_id'
+    booking = Booking.query.filter_by(id=booking_id, **{owner_column: user_id}).first()
+
+    if booking is None:
         flash('You are not authorized to cancel this booking', 'danger')
         return redirect(url_for('main.index'))
-    
+
     # Check if booking can be cancelled
     if booking.status not in ['pending', 'confirmed']:
         flash('This booking cannot be cancelled', 'warning')
@@ -648,8 +659,8 @@ def cancel_booking(booking_id):
     db.session.commit()
     
     flash('Booking cancelled successfully', 'success')
-    
-    if isinstance(user, Customer):
+
+    if user_type == 'customer':
         return redirect(url_for('customer.dashboard'))
     else:
         return redirect(url_for('provider.dashboard'))
@@ -657,19 +668,19 @@ def cancel_booking(booking_id):
 @booking_bp.route('/<int:booking_id>/complete', methods=['POST'])
 def complete_booking(booking_id):
     """Mark a booking as completed"""
-    provider = get_current_user()
-    
-    if not provider or not isinstance(provider, Provider):
+    provider_id = require_role('provider')
+
+    if not provider_id:
         flash('Please log in as a provider', 'warning')
         return redirect(url_for('provider.login'))
-    
-    booking = Booking.query.get_or_404(booking_id)
-    
-    # Check if provider owns this booking
-    if booking.provider_id != provider.id:
+
+    # Fetch and authorize in one query
+    booking = Booking.query.filter_by(id=booking_id, provider_id=provider_id).first()
+
+    if booking is None:
         flash('You are not authorized to complete this booking', 'danger')
         return redirect(url_for('provider.dashboard'))
-    
+
     # Check if booking can be completed
     if booking.status != 'confirmed':
         flash('This booking cannot be marked as completed', 'warning')
@@ -685,19 +696,19 @@ def complete_booking(booking_id):
 @booking_bp.route('/<int:booking_id>/rate', methods=['POST'])
 def rate_booking(booking_id):
     """Rate a completed booking"""
-    customer = get_current_user()
-    
-    if not customer or not isinstance(customer, Customer):
+    customer_id = require_role('customer')
+
+    if not customer_id:
         flash('Please log in as a customer', 'warning')
         return redirect(url_for('customer.login'))
-    
-    booking = Booking.query.get_or_404(booking_id)
-    
-    # Check if customer owns this booking
-    if booking.customer_id != customer.id:
+
+    # Fetch and authorize in one query
+    booking = Booking.query.filter_by(id=booking_id, customer_id=customer_id).first()
+
+    if booking is None:
         flash('You are not authorized to rate this booking', 'danger')
         return redirect(url_for('customer.dashboard'))
-    
+
     # Check if booking can be rated
     if booking.status != 'completed' or booking.rating is not None:
         flash('This booking cannot be rated', 'warning')
@@ -711,19 +722,20 @@ def rate_booking(booking_id):
         return redirect(url_for('booking.booking_detail', booking_id=booking_id))
     
     # Update booking with rating
-    booking.rating = int(rating)
+    rating = int(rating)
+    booking.rating = rating
     booking.rating_comment = comment
-    
-    # Update provider's average rating
-    provider = Provider.query.get(booking.provider_id)
-    rated_bookings = Booking.query.filter_by(
-        provider_id=provider.id,
-        status='completed'
-    ).filter(Booking.rating.isnot(None)).all()
-    
-    total_rating = sum(b.rating for b in rated_bookings)
-    provider.avg_rating = round(total_rating / len(rated_bookings), 2)
-    
+
+    # Update the provider's running totals atomically; the average follows
+    # from them without reloading the booking history
+    Provider.query.filter_by(id=booking.provider_id).update({
+        Provider.rating_count: Provider.rating_count + 1,
+        Provider.rating_sum: Provider.rating_sum + rating,
+        Provider.avg_rating: func.round(
+            (Provider.rating_sum + rating) * 1.0 / (Provider.rating_count + 1), 2
+        )
+    }, synchronize_session=False)
+
     db.session.commit()
     
     flash('Booking rated successfully', 'success')
@@ -733,19 +745,19 @@ def rate_booking(booking_id):
 @payment_bp.route('/process/<int:booking_id>', methods=['GET', 'POST'])
 def process(booking_id):
     """Process payment for a booking"""
-    customer = get_current_user()
-    
-    if not customer or not isinstance(customer, Customer):
+    customer_id = require_role('customer')
+
+    if not customer_id:
         flash('Please log in as a customer', 'warning')
         return redirect(url_for('customer.login'))
-    
-    booking = Booking.query.get_or_404(booking_id)
-    
-    # Check if customer owns this booking
-    if booking.customer_id != customer.id:
+
+    # Fetch and authorize in one query
+    booking = Booking.query.filter_by(id=booking_id, customer_id=customer_id).first()
+
+    if booking is None:
         flash('You are not authorized to pay for this booking', 'danger')
         return redirect(url_for('customer.dashboard'))
-    
+
     # Check if booking is pending
     if booking.status != 'pending':
         flash('This booking cannot be paid for', 'warning')
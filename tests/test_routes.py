@@ -0,0 +1,123 @@
+import unittest
+import os
+import sys
+
+# Add the parent directory to the path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app import app, db
+from models import Customer, OTPVerification
+from services import invalidate_category_cache
+
+# Known bcrypt hash of 'password', as used by the dummy-data seeder
+DUMMY_BCRYPT_HASH = "$2b$12$EixZaYVK1fsbY1eIYhQ3h.ihI9fhIvjZvJ/vJYrJXpIr8qz5ELu."
+
+class TestAuthFlow(unittest.TestCase):
+    """Request-level coverage of register -> verify OTP -> login"""
+
+    def setUp(self):
+        """Set up test environment"""
+        app.config['TESTING'] = True
+        app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///:memory:'
+        app.config['WTF_CSRF_ENABLED'] = False
+        # Keep OTPs out of Twilio and in the response flow
+        os.environ['OTP_TEST_MODE'] = 'True'
+
+        self.app_context = app.app_context()
+        self.app_context.push()
+        db.create_all()
+        invalidate_category_cache()
+        self.client = app.test_client()
+
+    def tearDown(self):
+        """Clean up after tests"""
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+        invalidate_category_cache()
+
+    def _register_customer(self):
+        """POST a valid customer registration and return the response"""
+        return self.client.post('/customer/register', data={
+            'email': 'alice@example.com',
+            'phone': '+35315550001',
+            'first_name': 'Alice',
+            'last_name': 'Johnson',
+            'password': 'correct-horse'
+        })
+
+    def _latest_otp_code(self):
+        """Fetch the most recently issued OTP code from the database"""
+        otp = OTPVerification.query.order_by(OTPVerification.id.desc()).first()
+        self.assertIsNotNone(otp)
+        return otp.otp_code
+
+    def test_register_verify_login_dashboard(self):
+        """Full happy path: register, verify the OTP, use and renew the session"""
+        response = self._register_customer()
+        self.assertEqual(response.status_code, 302)
+        self.assertIn('/verify-otp', response.headers['Location'])
+
+        # Submitting the issued code verifies the account and logs in;
+        # following the redirect also exercises flashed-message rendering
+        response = self.client.post(
+            '/verify-otp', data={'otp_code': self._latest_otp_code()},
+            follow_redirects=True
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(b'Phone verified successfully', response.data)
+
+        response = self.client.get('/customer/dashboard')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(b'Alice', response.data)
+
+        # Log out and back in with the registration password
+        self.client.get('/logout')
+        response = self.client.post('/customer/login', data={
+            'email': 'alice@example.com',
+            'password': 'correct-horse'
+        }, follow_redirects=True)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(b'You are now logged in', response.data)
+
+    def test_verify_otp_rejects_wrong_code(self):
+        """A wrong code re-renders the form with an error, not a login"""
+        self._register_customer()
+        code = self._latest_otp_code()
+        wrong = '000000' if code != '000000' else '111111'
+
+        response = self.client.post('/verify-otp', data={'otp_code': wrong})
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(b'Invalid or expired verification code', response.data)
+
+        customer = Customer.query.filter_by(email='alice@example.com').first()
+        self.assertFalse(customer.is_verified)
+
+    def test_login_with_seeded_bcrypt_account(self):
+        """Accounts seeded with the legacy bcrypt hash can still log in"""
+        customer = Customer(
+            email='seeded@example.com',
+            phone='+35315550002',
+            password_hash=DUMMY_BCRYPT_HASH,
+            first_name='Seeded',
+            last_name='User',
+            is_verified=True
+        )
+        db.session.add(customer)
+        db.session.commit()
+
+        response = self.client.post('/customer/login', data={
+            'email': 'seeded@example.com',
+            'password': 'password'
+        }, follow_redirects=True)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(b'You are now logged in', response.data)
+
+    def test_flashed_message_renders_after_redirect(self):
+        """Flashes survive the session round-trip (orjson provider)"""
+        response = self.client.get('/logout', follow_redirects=True)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(b'You have been logged out', response.data)
+
+if __name__ == '__main__':
+    unittest.main()
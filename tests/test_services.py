@@ -7,9 +7,16 @@ from math import radians
 # Add the parent directory to the path
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
+import numpy as np
+
 from app import app, db
+from db_setup import bulk_insert
 from models import Customer, Provider, ServiceCategory, ProviderCategory, Address, Booking, Payment, OTPVerification
-from services import calculate_distance, calculate_provider_score, find_matching_providers, generate_otp, verify_otp
+from services import (
+    calculate_distance, calculate_provider_score, find_matching_providers,
+    generate_otp, verify_otp, hash_password, verify_password,
+    score_providers, get_service_categories, invalidate_category_cache
+)
 
 class TestServices(unittest.TestCase):
     def setUp(self):
@@ -248,5 +255,94 @@ class TestServices(unittest.TestCase):
         db.session.commit()
         self.assertFalse(verify_otp(self.customer_id, '345678', 'customer'))
 
+    def test_verify_password_roundtrip(self):
+        """Test that freshly hashed passwords verify (and wrong ones don't)"""
+        stored_hash = hash_password('topsecret')
+
+        valid, _ = verify_password(stored_hash, 'topsecret')
+        self.assertTrue(valid)
+
+        valid, new_hash = verify_password(stored_hash, 'wrong-password')
+        self.assertFalse(valid)
+        self.assertIsNone(new_hash)
+
+    def test_verify_password_legacy_bcrypt(self):
+        """Test the fallback for the seeder's legacy bcrypt hashes"""
+        bcrypt_hash = "$2b$12$EixZaYVK1fsbY1eIYhQ3h.ihI9fhIvjZvJ/vJYrJXpIr8qz5ELu."
+
+        valid, _ = verify_password(bcrypt_hash, 'password')
+        self.assertTrue(valid)
+
+        valid, _ = verify_password(bcrypt_hash, 'not-the-password')
+        self.assertFalse(valid)
+
+    def test_score_providers(self):
+        """Test the vectorized scoring kernel against the scalar ladder"""
+        scores = score_providers(
+            avg_ratings=[5.0, np.nan],
+            experience_years=[20, 0],
+            price_rates=[np.nan, np.nan],
+            avg_price=0,
+            distances=[1.0, np.inf]
+        )
+
+        # Top rating (40) + capped experience (30) + within 5km (15)
+        self.assertAlmostEqual(scores[0], 85.0)
+        # Unrated neutral (20), no experience, unknown price/distance
+        self.assertAlmostEqual(scores[1], 20.0)
+
+    def test_score_providers_matches_scalar_scorer(self):
+        """Test that the kernel agrees with calculate_provider_score"""
+        customer_address = Address.query.get(self.customer_address_id)
+        provider = Provider.query.get(self.provider1_id)
+        avg_prices = {self.plumbing_id: 47.5}
+
+        scalar_score = calculate_provider_score(
+            provider, customer_address, self.plumbing_id, avg_prices
+        )
+        distance = calculate_distance(
+            customer_address.latitude, customer_address.longitude,
+            53.350140, -6.266155
+        )
+        vector_scores = score_providers(
+            [provider.avg_rating], [provider.experience_years],
+            [50.0], 47.5, [distance]
+        )
+        self.assertAlmostEqual(scalar_score, vector_scores[0])
+
+    def test_bulk_insert(self):
+        """Test the paged Core-insert helper"""
+        rows = [
+            {"name": f"Category {i}", "description": f"Service {i}"}
+            for i in range(5)
+        ]
+        before = ServiceCategory.query.count()
+
+        # page_size below the row count forces multiple executemany pages
+        bulk_insert(ServiceCategory, rows, page_size=2)
+        self.assertEqual(ServiceCategory.query.count(), before + 5)
+
+        # With commit=False the rows stay in the open transaction
+        bulk_insert(ServiceCategory, [{"name": "Uncommitted", "description": "x"}],
+                    commit=False)
+        db.session.rollback()
+        self.assertEqual(ServiceCategory.query.count(), before + 5)
+
+    def test_get_service_categories_cached(self):
+        """Test that the category list is served from cache until invalidated"""
+        invalidate_category_cache()
+
+        categories = get_service_categories()
+        self.assertEqual({c.name for c in categories}, {"Plumbing", "Electrical"})
+
+        # A direct insert is invisible until the cache is invalidated
+        db.session.add(ServiceCategory(name="Roofing", description="Roofs"))
+        db.session.commit()
+        self.assertIs(get_service_categories(), categories)
+
+        invalidate_category_cache()
+        self.assertIn("Roofing", {c.name for c in get_service_categories()})
+        invalidate_category_cache()
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file